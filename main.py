@@ -1,15 +1,45 @@
 import csv
-import json
 import logging
-from venv import logger
-
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from enum import IntEnum
+from functools import cached_property
+from types import MappingProxyType
+
+import orjson
 import requests
-from pydantic import BaseModel, Field
-from typing import List, Any, Dict
+from pydantic import BaseModel, PrivateAttr
+from requests.adapters import HTTPAdapter
+from typing import List, Any, Dict, Mapping
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+CSV_BUFFER_SIZE = 1 << 18  # 256 KiB
+POOL_MAXSIZE = 8  # Connections kept alive per host, also the default GPX workers
+
+
+class ActivityCategory(IntEnum):
+    """The activities we support, keyed on the prefix of the activity key."""
+
+    UNSUPPORTED = 0
+    HIKING = 1
+    RUNNING = 2
+    RIDING = 3
+    BICYCLE = 4
+
+
+ACTIVITY_CATEGORIES: Mapping[str, ActivityCategory] = MappingProxyType(
+    {
+        "hiking": ActivityCategory.HIKING,
+        "running": ActivityCategory.RUNNING,
+        "riding": ActivityCategory.RIDING,
+        "bicycle": ActivityCategory.BICYCLE,
+        "gravel": ActivityCategory.BICYCLE,
+    }
+)
+
 
 class Activity(BaseModel):
     """ "activity": {
@@ -23,10 +53,11 @@ class Activity(BaseModel):
     value: str
 
 
-class TrailItem(BaseModel):
-    """Represents a trail item with only the 'id' field."""
+@dataclass
+class TrailItem:
+    """Represents a trail item (a plain dataclass to skip pydantic validation)."""
 
-    id: str = Field(..., description="The unique identifier for the trail.")
+    id: str  # The unique identifier for the trail.
     objectClass: str
     content: Any
     properties: Any
@@ -36,66 +67,56 @@ class TrailItem(BaseModel):
     def network_id(self) -> str:
         return self.networkId
 
-    @property
-    def activity(self) -> Dict[str, Any]:
-        logger.debug("activity: running")
-        if self.content:
-            return self.content.get("activity", {})
-        else:
-            raise ValueError("no self.content")
-
-    @property
-    def activity_key(self):
-        logger.debug("activity_key: running")
-        if self.activity:
-            return self.activity.get("key", "")
-        else:
+    @cached_property
+    def activity_key(self) -> str:
+        content = self.content
+        if not content:
             return ""
+        # Only a handful of distinct keys exist, so share them across items
+        return sys.intern((content.get("activity") or {}).get("key") or "")
 
-    @property
+    @cached_property
+    def activity_category(self) -> ActivityCategory:
+        """The category of the key prefix, e.g. BICYCLE for "bicycle-dh"."""
+        prefix = self.activity_key.split("-", 1)[0]
+        return ACTIVITY_CATEGORIES.get(prefix, ActivityCategory.UNSUPPORTED)
+
+    @cached_property
     def has_running_activity(self) -> bool:
-        if "running" in self.activity_key:
-            return True
-        return False
+        return self.activity_category == ActivityCategory.RUNNING
 
-    @property
+    @cached_property
     def has_riding_activity(self) -> bool:
-        if "riding" in self.activity_key:
-            return True
-        return False
+        return self.activity_category == ActivityCategory.RIDING
 
-    @property
+    @cached_property
     def has_hike_activity(self) -> bool:
-        if "hiking" in self.activity_key:
-            return True
-        return False
+        return self.activity_category == ActivityCategory.HIKING
 
-    @property
+    @cached_property
     def has_bike_activity(self) -> bool:
-        if "bicycle" or "gravel" in self.activity_key:
-            return True
-        return False
+        return self.activity_category == ActivityCategory.BICYCLE
 
-    @property
+    @cached_property
     def is_multitrail(self) -> bool:
         return self.properties["isMultiTrail"]
 
-    @property
+    @cached_property
     def url(self):
         return f"https://www.aretrails.com/trail/{self.id}"
 
-    @property
+    @cached_property
     def title(self):
         return self.content["title"]
 
-    @property
+    @cached_property
     def length(self):
         if self.properties["trailDistanceMeter"]:
             return int(float(self.properties["trailDistanceMeter"]))
         else:
             return 0
 
-    @property
+    @cached_property
     def length_in_km(self):
         if self.properties["trailDistanceMeter"]:
             return round(float(self.properties["trailDistanceMeter"]) / 1000, 1)
@@ -110,17 +131,55 @@ class TrailItem(BaseModel):
     def class_(self):
         return self.objectClass
 
-    @property
+    @cached_property
     def gpx_url(self):
         return f"https://func-gaiaplaces-aretrails.azurewebsites.net/api/ContentItem/geo/{self.id}/gpx?networkId={self.network_id}&draft=0&code="
 
 
+def build_session() -> requests.Session:
+    """Build a keep-alive session shared by all requests to Åre Trails."""
+    session = requests.Session()
+    session.headers.update(
+        {
+            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:132.0) Gecko/20100101 Firefox/132.0",
+            "Accept": "application/json, text/plain, */*",
+            "Accept-Language": "en-US,en;q=0.5",
+            "Accept-Encoding": "gzip, deflate, br, zstd",
+            "Authorization": "Bearer undefined",
+            "userId": "portal",
+            "Origin": "https://www.aretrails.com",
+            "DNT": "1",
+            "Connection": "keep-alive",
+            "Referer": "https://www.aretrails.com/",
+            "Sec-Fetch-Dest": "empty",
+            "Sec-Fetch-Mode": "cors",
+            "Sec-Fetch-Site": "cross-site",
+        }
+    )
+    # All requests go to the same host, so only the pool size matters
+    adapter = HTTPAdapter(pool_maxsize=POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    return session
+
+
 class AreTrailsData(BaseModel):
     """Represents the AreTrails API response."""
 
     # language: str
     items: List[TrailItem] = []
     data: Any = None  # Raw JSON data storage (optional, for additional use cases)
+    # Buckets filled by parse_items()
+    _trails: List[TrailItem] = []
+    _multitrails: List[TrailItem] = []
+    _hiking_trails: List[TrailItem] = []
+    _bicycle_trails: List[TrailItem] = []
+    _riding_trails: List[TrailItem] = []
+    _running_trails: List[TrailItem] = []
+    _trails_with_activity: List[TrailItem] = []
+    _trails_without_activity: List[TrailItem] = []
+    _trails_with_unsupported_activity: List[TrailItem] = []
+
+    _session: requests.Session = PrivateAttr(default_factory=build_session)
 
     def fetch_aretrails_json(self) -> None:
         url = "https://func-gaiaplaces-aretrails.azurewebsites.net/api/ContentItem/cms"
@@ -130,127 +189,167 @@ class AreTrailsData(BaseModel):
             "draft": "0",
             "code": "BUSCKN5Xo/OT8C6BQEI8bniVuMODzyvq2WHS7L1aoqPcxDJLcYYuIA==",
         }
-        headers = {
-            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:132.0) Gecko/20100101 Firefox/132.0",
-            "Accept": "application/json, text/plain, */*",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate, br, zstd",
-            "Authorization": "Bearer undefined",
-            "userId": "portal",
-            "Origin": "https://www.aretrails.com",
-            "DNT": "1",
-            "Connection": "keep-alive",
-            "Referer": "https://www.aretrails.com/",
-            "Sec-Fetch-Dest": "empty",
-            "Sec-Fetch-Mode": "cors",
-            "Sec-Fetch-Site": "cross-site",
-        }
 
-        response = requests.get(url, headers=headers, params=params)
+        response = self._session.get(url, params=params)
         response.raise_for_status()  # Raise an error for bad HTTP responses
-        json_data = response.json()
+        json_data = orjson.loads(response.content)
         self.data = json_data
         # self.language = json_data["language"]
 
     def parse_items(self):
-        self.items = [TrailItem(**item) for item in self.data["items"]]
+        """Parse the raw items and bucket the trails by activity in a single pass."""
+        # Bind the lists to locals so the loop avoids repeated attribute lookups
+        items = []
+        trails = []
+        multitrails = []
+        hiking_trails = []
+        bicycle_trails = []
+        riding_trails = []
+        running_trails = []
+        with_activity = []
+        without_activity = []
+        unsupported = []
+        buckets = {
+            ActivityCategory.HIKING: hiking_trails,
+            ActivityCategory.RUNNING: running_trails,
+            ActivityCategory.RIDING: riding_trails,
+            ActivityCategory.BICYCLE: bicycle_trails,
+        }
+        for data in self.data["items"]:
+            item = TrailItem(
+                id=data["id"],
+                objectClass=sys.intern(data["objectClass"]),
+                content=data.get("content"),
+                properties=data.get("properties"),
+                networkId=sys.intern(data["networkId"]),
+            )
+            items.append(item)
+            if item.objectClass != "trail":
+                continue
+            trails.append(item)
+            if item.is_multitrail:
+                multitrails.append(item)
+            if item.activity_key:
+                with_activity.append(item)
+            else:
+                without_activity.append(item)
+            bucket = buckets.get(item.activity_category)
+            if bucket is None:
+                unsupported.append(item)
+            else:
+                bucket.append(item)
+        self.items = items
+        self._trails = trails
+        self._multitrails = multitrails
+        self._hiking_trails = hiking_trails
+        self._bicycle_trails = bicycle_trails
+        self._riding_trails = riding_trails
+        self._running_trails = running_trails
+        self._trails_with_activity = with_activity
+        self._trails_without_activity = without_activity
+        self._trails_with_unsupported_activity = unsupported
+        # The raw response is no longer needed once the items are parsed
+        self.data = None
 
     def save_json_to_disk(self, filename: str = "aretrails.json"):
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(json.dumps(self.dict(), indent=4, ensure_ascii=False))
+        """Write the response JSON to disk.
+
+        Before parse_items the raw response is written as is. parse_items
+        releases the raw response, so afterwards only the items are written and
+        any other top-level keys of the response are dropped."""
+        if self.data is not None:
+            data = self.data
+        else:
+            names = [field.name for field in fields(TrailItem)]
+            data = {
+                "items": [
+                    {name: getattr(item, name) for name in names} for item in self.items
+                ]
+            }
+        with open(filename, "wb") as f:
+            f.write(orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2))
         print(f"JSON saved successfully to '{filename}'.")
 
     @property
     def trails(self):
-        return [item for item in self.items if item.class_ == "trail"]
+        return self._trails
 
     @property
     def multitrails(self):
-        return [
-            item for item in self.items if item.class_ == "trail" and item.is_multitrail
-        ]
+        return self._multitrails
 
     @property
     def riding_trails(self):
-        return [
-            item
-            for item in self.items
-            if item.class_ == "trail" and item.has_riding_activity
-        ]
+        return self._riding_trails
 
     @property
     def bicycle_trails(self):
-        return [
-            item
-            for item in self.items
-            if item.class_ == "trail" and item.has_bike_activity
-        ]
+        return self._bicycle_trails
 
     @property
     def hiking_trails(self):
-        return [
-            item
-            for item in self.items
-            if item.class_ == "trail" and item.has_hike_activity
-        ]
+        return self._hiking_trails
 
     @property
     def running_trails(self):
-        return [
-            item
-            for item in self.items
-            if item.class_ == "trail" and item.has_running_activity
-        ]
+        return self._running_trails
 
     @property
     def trails_with_activity(self):
-        return [
-            item
-            for item in self.items
-            if item.class_ == "trail" and item.activity != {}
-        ]
+        return self._trails_with_activity
 
     @property
     def trails_without_activity(self):
-        return [
-            item
-            for item in self.items
-            if item.class_ == "trail" and item.activity == {}
-        ]
+        return self._trails_without_activity
 
     @property
     def trails_with_unsupported_activity(self):
-        return [
-            item
-            for item in self.items
-            if item.class_ == "trail"
-            and not (
-                item.has_hike_activity
-                or item.has_riding_activity
-                or item.has_bike_activity
-                or item.has_running_activity
-            )
-        ]
+        return self._trails_with_unsupported_activity
 
     def export_trails_to_csv(self, filename: str = "trails.csv"):
         """Export trail items to a CSV file with specified columns."""
-        with open(filename, mode="w", encoding="utf-8", newline="") as csvfile:
+        # Large write buffer so the export is flushed in a few syscalls
+        with open(
+            filename,
+            mode="w",
+            encoding="utf-8",
+            newline="",
+            buffering=CSV_BUFFER_SIZE,
+        ) as csvfile:
             fieldnames = ["title", "number", "activity_key", "multitrail", "length", "url", "gpx"]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-            writer.writeheader()
-            for trail in self.trails:
-                writer.writerow({
-                    "title": trail.title,
-                    "number": trail.number,
-                    "activity_key": trail.activity_key,
-                    "multitrail": trail.is_multitrail,
-                    "length": trail.length,
-                    "url": trail.url,
-                    "gpx": trail.gpx_url
-                })
+            writer = csv.writer(csvfile)
+
+            writer.writerow(fieldnames)
+            writer.writerows(
+                (
+                    trail.title,
+                    trail.number,
+                    trail.activity_key,
+                    trail.is_multitrail,
+                    trail.length,
+                    trail.url,
+                    trail.gpx_url,
+                )
+                for trail in self.trails
+            )
         print(f"Trail items exported successfully to '{filename}'.")
 
+    def fetch_gpx(self, trail: TrailItem) -> bytes:
+        """Download the GPX file of a trail over the shared session."""
+        response = self._session.get(trail.gpx_url)
+        response.raise_for_status()
+        return response.content
+
+    def fetch_all_gpx(self, max_workers: int = POOL_MAXSIZE) -> Dict[str, bytes]:
+        """Download the GPX files of all trails concurrently over the shared session.
+
+        Returns a dict mapping trail id to the raw GPX data. max_workers is
+        capped at POOL_MAXSIZE so every worker reuses a pooled connection."""
+        max_workers = min(max_workers, POOL_MAXSIZE)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            gpx_files = executor.map(self.fetch_gpx, self.trails)
+            return {trail.id: gpx for trail, gpx in zip(self.trails, gpx_files)}
+
 
 if __name__ == "__main__":
     try: